@@ -1,19 +1,49 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import fcntl
+from functools import lru_cache
+import hashlib
+import json
+import math
 import os
 import sys
-import pandas as pd
-import plotly.express as px
+import tempfile
+import time
+
 from dash import (
+    callback_context,
     Dash,
+    dash_table,
     dcc,
     html,
     Input,
-    Output,
-    dash_table,
-    callback_context,
     no_update,
+    Output,
+    Patch,
     State,
 )
+from dash.dash_table.Format import Format, Scheme
+from flask.json.provider import DefaultJSONProvider
+import numpy as np
+import pandas as pd
+from plotly.colors import hex_to_rgb
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.io import write_image
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+try:
+    from isal import igzip
+except ImportError:
+    igzip = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 """
 This script generates a dashboard from a TSV file.
@@ -28,53 +58,1036 @@ Testing:
 python generate_dashboard.py per_read_stats.tsv
 ```
 
+Showing additional columns in the tables:
+
+```
+python generate_dashboard.py per_read_stats.tsv --extra_columns runid channel
+```
+
+If installed, `isal` is used to decompress gzipped input and `orjson` to encode the
+JSON responses, both considerably faster than their standard library equivalents.
+
+Serving with multiple workers:
+
+```
+gunicorn -w 4 -k gthread --threads 4 'generate_dashboard:create_server("stats.tsv")'
+```
+
 """
 
 
-def generate_dashboard(
-    per_read_stats_tsv: str,
-    dashboard_closed_file: str = "dashboard_closed",
-    mid_threshold: int = 5000,
-    long_threshold: int = 10000,
-):
-    """Generate an interactive dashboard from a TSV file containing per-read statistics.
+# Only these columns are used by the dashboard; the others are not read at all
+PER_READ_STATS_COLUMNS = ["read_id", "sample_name", "read_length", "mean_quality"]
+PER_READ_STATS_TYPES = {
+    "read_id": pa.large_string(),
+    "sample_name": pa.dictionary(pa.int32(), pa.string()),
+    "read_length": pa.uint32(),
+    "mean_quality": pa.float32(),
+    # optional columns, only read when requested
+    "filename": pa.dictionary(pa.int32(), pa.string()),
+    "runid": pa.dictionary(pa.int32(), pa.string()),
+    "channel": pa.uint16(),
+    "read_number": pa.uint32(),
+}
+
+# Keep strings (e.g. the read IDs) in contiguous Arrow buffers when converting to
+# pandas, rather than as one Python object per value
+ARROW_STRING_TYPES = {
+    pa.string(): pd.StringDtype("pyarrow"),
+    pa.large_string(): pd.StringDtype("pyarrow"),
+}
+
+
+def read_per_read_stats(per_read_stats_tsv, columns=PER_READ_STATS_COLUMNS):
+    """Read a (optionally gzipped) per-read stats TSV with the pyarrow CSV reader.
+
+    The pyarrow reader parses multi-threaded, which is considerably faster than the
+    default pandas engine for large files. If `isal` is available, gzipped input is
+    decompressed through `isal.igzip`, otherwise pyarrow inflates it natively.
 
     Parameters
     ----------
     per_read_stats_tsv : str
         Path to the TSV file containing per-read statistics.
-    dashboard_closed_file : str, optional
-        Path to the file that will be created when the dashboard is closed, by default 'dashboard_closed'.
+    columns : list, optional
+        Columns to read, by default `PER_READ_STATS_COLUMNS`.
 
     Returns
     -------
-    None
+    pd.DataFrame
     """
-
-    app = Dash(__name__)
-    df = pd.read_csv(
-        per_read_stats_tsv,
-        sep="\t",
-        compression="gzip" if per_read_stats_tsv.endswith(".gz") else None,
+    # parse in 1 MiB blocks (rather than the 64 kB default) across the reader threads
+    read_options = pa_csv.ReadOptions(block_size=1 << 20)
+    parse_options = pa_csv.ParseOptions(delimiter="\t")
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=columns,
+        column_types={
+            column: PER_READ_STATS_TYPES[column]
+            for column in columns
+            if column in PER_READ_STATS_TYPES
+        },
     )
+    if per_read_stats_tsv.endswith(".gz") and igzip is not None:
+        with igzip.open(per_read_stats_tsv, "rb") as fh:
+            table = pa_csv.read_csv(
+                fh,
+                read_options=read_options,
+                parse_options=parse_options,
+                convert_options=convert_options,
+            )
+    else:
+        table = pa_csv.read_csv(
+            per_read_stats_tsv,
+            read_options=read_options,
+            parse_options=parse_options,
+            convert_options=convert_options,
+        )
+    return table.to_pandas(types_mapper=ARROW_STRING_TYPES.get)
+
+
+def _remove_file(path):
+    """Remove a file, if it still exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def load_per_read_stats(per_read_stats_tsv, columns=PER_READ_STATS_COLUMNS):
+    """Load per-read stats, caching them as Parquet next to the TSV on first load.
+
+    Subsequent loads read the (typed, columnar) Parquet file instead of parsing the
+    TSV again, as long as the cache is newer than the TSV and has all `columns`. An
+    unreadable cache is ignored and the TSV parsed instead.
+
+    Parameters
+    ----------
+    per_read_stats_tsv : str
+        Path to the TSV file containing per-read statistics.
+    columns : list, optional
+        Columns to load, by default `PER_READ_STATS_COLUMNS`.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    cached = per_read_stats_tsv + ".parquet"
+    if os.path.exists(cached) and os.path.getmtime(cached) > os.path.getmtime(
+        per_read_stats_tsv
+    ):
+        try:
+            if set(columns) <= set(pq.read_schema(cached).names):
+                return pd.read_parquet(cached, columns=columns)
+        except (OSError, pa.ArrowInvalid) as e:
+            sys.stderr.write(f"Failed to read cached per-read stats: {e}\n")
+
+    df = read_per_read_stats(per_read_stats_tsv, columns)
+    # write to a temporary file first, so no (concurrently starting) process reads
+    # a partial cache
+    tmp = f"{cached}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp, engine="pyarrow", compression="zstd")
+        os.replace(tmp, cached)
+    except OSError as e:
+        sys.stderr.write(f"Failed to cache per-read stats: {e}\n")
+        _remove_file(tmp)
+    return df
+
+
+def prepare_per_read_stats(per_read_stats_tsv, columns=PER_READ_STATS_COLUMNS):
+    """Load per-read stats and prepare them for the dashboard.
+
+    Columns are renamed for display, shrunk to compact dtypes and the rows are
+    sorted by read length.
+
+    Parameters
+    ----------
+    per_read_stats_tsv : str
+        Path to the TSV file containing per-read statistics.
+    columns : list, optional
+        Columns to load, by default `PER_READ_STATS_COLUMNS`.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    df = load_per_read_stats(per_read_stats_tsv, columns)
 
     # rename columns
     df = df.rename(
         columns={"read_length": "Read Length", "mean_quality": "Average QScore"}
     )
 
-    # Create a color map for sample names
-    sample_names = df["sample_name"].unique()
+    # shrink the frame: low-cardinality strings as categoricals, downcast numerics
+    for column in ("sample_name", "filename", "runid"):
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    for column in df.columns:
+        if pd.api.types.is_integer_dtype(df[column]):
+            downcast = "unsigned" if (df[column] >= 0).all() else "integer"
+            df[column] = pd.to_numeric(df[column], downcast=downcast)
+        elif pd.api.types.is_float_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column], downcast="float")
+
+    # Sort by read length, so read length ranges can be found by binary search
+    return df.sort_values("Read Length", kind="stable", ignore_index=True)
+
+
+def shared_per_read_stats(
+    per_read_stats_tsv, columns=PER_READ_STATS_COLUMNS, shared_dir=None
+):
+    """Return the prepared per-read stats backed by a memory-mapped Arrow IPC file.
+
+    The first process prepares the stats and writes them to the IPC file, while
+    holding an exclusive lock on `<file>.lock`, so processes starting together
+    (e.g. gunicorn workers without `--preload`) wait for it rather than each
+    preparing their own copy. Every process then memory-maps that file. The
+    columns of the frame are not copied out of the mapping, so all processes share
+    their physical pages. Only the per-sample arrays built by `group_by_sample`
+    (read lengths, qscores and row positions, about 16 bytes per read) are still
+    held by each process.
+
+    Like the Parquet cache, the file is kept after the processes exit and reused
+    by later runs until the TSV changes.
+
+    If the file can't be written (e.g. `/dev/shm` is too small, which it is by
+    default in Docker containers) or mapped, the stats are loaded into the memory
+    of this process instead, see `prepare_per_read_stats`.
+
+    Parameters
+    ----------
+    per_read_stats_tsv : str
+        Path to the TSV file containing per-read statistics.
+    columns : list, optional
+        Columns to load, by default `PER_READ_STATS_COLUMNS`.
+    shared_dir : str, optional
+        Directory for the IPC file, by default `/dev/shm` if it exists and the
+        temporary directory otherwise.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    if shared_dir is None:
+        shared_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    key = f"{os.path.abspath(per_read_stats_tsv)}:{','.join(columns)}"
+    shared = os.path.join(
+        shared_dir, f"per_read_stats-{hashlib.md5(key.encode()).hexdigest()}.arrow"
+    )
+
+    try:
+        lock = open(f"{shared}.lock", "w")
+    except OSError as e:
+        sys.stderr.write(f"Failed to share per-read stats: {e}\n")
+        return prepare_per_read_stats(per_read_stats_tsv, columns)
+    with lock:
+        # released when the lock file is closed
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not (
+            os.path.exists(shared)
+            and os.path.getmtime(shared) > os.path.getmtime(per_read_stats_tsv)
+        ):
+            df = prepare_per_read_stats(per_read_stats_tsv, columns)
+            # write to a temporary file first, so no process maps a partial file
+            tmp = f"{shared}.{os.getpid()}.tmp"
+            try:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                with pa.OSFile(tmp, "wb") as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+                os.replace(tmp, shared)
+            except OSError as e:
+                sys.stderr.write(f"Failed to share per-read stats: {e}\n")
+                _remove_file(tmp)
+                return df
+
+    try:
+        table = pa.ipc.open_file(pa.memory_map(shared, "r")).read_all()
+    except (OSError, pa.ArrowInvalid) as e:
+        sys.stderr.write(f"Failed to map shared per-read stats: {e}\n")
+        return prepare_per_read_stats(per_read_stats_tsv, columns)
+    # keep strings in their Arrow buffers rather than copying them into objects
+    return table.to_pandas(split_blocks=True, types_mapper=ARROW_STRING_TYPES.get)
+
+
+READ_LENGTH_CATEGORIES = ["short reads", "mid reads", "long reads"]
+TABLE_PAGE_SIZE = 25
+RELAYOUT_DEBOUNCE_MS = 250
+
+# DataTable filter operators, see https://dash.plotly.com/datatable/callbacks
+FILTER_OPERATORS = [
+    ["ge ", ">="],
+    ["le ", "<="],
+    ["lt ", "<"],
+    ["gt ", ">"],
+    ["ne ", "!="],
+    ["eq ", "="],
+    ["contains "],
+    ["datestartswith "],
+]
+
+
+def categorise_read_lengths(read_lengths, mid_threshold, long_threshold):
+    """Assign each read length to the short, mid or long read length category.
+
+    Bins are right-inclusive (like `pd.cut`), i.e. a read of exactly `mid_threshold`
+    bases is a short read. Unlike the previous `pd.cut` binning (starting at 0),
+    reads of length 0 are short reads rather than left uncategorised. Uses a single
+    vectorised `np.searchsorted` over the two thresholds instead of building an
+    `IntervalIndex`.
+
+    Parameters
+    ----------
+    read_lengths : array-like
+        Read lengths to categorise.
+    mid_threshold : int
+        Read lengths above this value are at least mid reads.
+    long_threshold : int
+        Read lengths above this value are long reads.
+
+    Returns
+    -------
+    pd.Categorical
+
+    Raises
+    ------
+    ValueError
+        If `mid_threshold` is not below `long_threshold`.
+    """
+    # searchsorted needs sorted bins and would silently miscategorise otherwise
+    if not mid_threshold < long_threshold:
+        raise ValueError(
+            f"mid_threshold ({mid_threshold}) must be below "
+            f"long_threshold ({long_threshold})."
+        )
+    codes = np.searchsorted(
+        np.array([mid_threshold, long_threshold]), np.asarray(read_lengths)
+    )
+    return pd.Categorical.from_codes(codes, categories=READ_LENGTH_CATEGORIES)
+
+
+def group_by_sample(df):
+    """Split the plotted columns of the per-read stats into per-sample arrays.
+
+    Callbacks and figure builders work on these contiguous per-sample arrays rather
+    than filtering the full DataFrame by sample each time.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Per-read statistics with `sample_name`, `Read Length` and `Average QScore`.
+
+    Returns
+    -------
+    dict
+        Mapping of sample name to a dict with the read lengths (`rl`), qscores (`q`)
+        and row positions in `df` (`idx`) of the sample's reads.
+    """
+    read_lengths = df["Read Length"].to_numpy()
+    qscores = df["Average QScore"].to_numpy()
+    indices = df.groupby("sample_name", observed=True).indices
+    # keep the category order, so traces and legend entries follow the samples
+    return {
+        name: {"rl": read_lengths[idx], "q": qscores[idx], "idx": idx}
+        for name in df["sample_name"].cat.categories
+        if (idx := indices.get(name)) is not None
+    }
+
+
+def _value_range(sample_groups, key):
+    """Return the minimum and maximum of one of the arrays over all sample groups."""
+    if not sample_groups:
+        return 0, 1
+    return (
+        min(group[key].min() for group in sample_groups.values()),
+        max(group[key].max() for group in sample_groups.values()),
+    )
+
+
+def uniform_bin_counts(x, y, x_range, y_range, nbinsx, nbinsy):
+    """Count points in a grid of equally sized bins, like `np.histogram2d`.
+
+    Rather than searching the bin edges for every point, the bin of a point is
+    computed directly from its scaled value (as e.g. datashader does), which is
+    several times faster. Bins include their lower edge, the last bins also their
+    upper edge; points outside the y-range are ignored.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        X-values, all within `x_range`.
+    y : np.ndarray
+        Y-values.
+    x_range : tuple
+        Lower and upper edge of the x-bins.
+    y_range : tuple
+        Lower and upper edge of the y-bins.
+    nbinsx : int
+        Number of x-bins.
+    nbinsy : int
+        Number of y-bins.
+
+    Returns
+    -------
+    np.ndarray
+        Counts of shape `(nbinsx, nbinsy)`.
+    """
+    inside = (y >= y_range[0]) & (y <= y_range[1])
+    bins = []
+    for values, (lo, hi), nbins in (
+        (x[inside], x_range, nbinsx),
+        (y[inside], y_range, nbinsy),
+    ):
+        scale = nbins / (hi - lo) if hi > lo else 0
+        # in float, as the bounds may not fit the (e.g. uint16) dtype of the values
+        values_bins = ((values.astype(np.float64) - lo) * scale).astype(np.intp)
+        # values on the upper edge go into the last bin
+        bins.append(np.minimum(values_bins, nbins - 1, out=values_bins))
+    return np.bincount(bins[0] * nbinsy + bins[1], minlength=nbinsx * nbinsy).reshape(
+        nbinsx, nbinsy
+    )
+
+
+def density_counts(sample_groups, x_range=None, y_range=None, nbinsx=256, nbinsy=128):
+    """Count the reads of each sample in a grid of read length and qscore bins.
+
+    Parameters
+    ----------
+    sample_groups : dict
+        Per-sample read lengths and qscores, see `group_by_sample`.
+    x_range : tuple, optional
+        Read length range to bin, by default the range of all reads.
+    y_range : tuple, optional
+        Qscore range to bin, by default the range of all reads.
+    nbinsx : int, optional
+        Number of read length bins, by default 256.
+    nbinsy : int, optional
+        Number of qscore bins, by default 128.
+
+    Returns
+    -------
+    tuple
+        The read length and qscore bin centers, and a dict of sample name to the
+        counts (with qscore bins as rows and empty bins as NaN).
+    """
+    x_range = x_range or _value_range(sample_groups, "rl")
+    y_range = y_range or _value_range(sample_groups, "q")
+    # share the bin edges between samples so the heatmaps line up
+    xedges = np.linspace(*x_range, nbinsx + 1)
+    yedges = np.linspace(*y_range, nbinsy + 1)
+
+    counts = {}
+    for name, group in sample_groups.items():
+        # read lengths are sorted, so the reads within the x-range are a slice
+        lo = np.searchsorted(group["rl"], x_range[0], side="left")
+        hi = np.searchsorted(group["rl"], x_range[1], side="right")
+        sample_counts = uniform_bin_counts(
+            group["rl"][lo:hi], group["q"][lo:hi], x_range, y_range, nbinsx, nbinsy
+        )
+        # heatmap rows are y; leave empty bins transparent
+        counts[name] = np.where(sample_counts > 0, sample_counts, np.nan).T
+    return (xedges[:-1] + xedges[1:]) / 2, (yedges[:-1] + yedges[1:]) / 2, counts
+
+
+def binned_density_figure(sample_groups, color_map, title, nbinsx=256, nbinsy=128):
+    """Plot read length vs. qscore as per-sample 2D histograms binned server-side.
+
+    Only the bin counts are sent to the browser, so the figure size is independent of
+    the number of reads. Empty bins are transparent, so the samples can be overlaid.
+
+    Parameters
+    ----------
+    sample_groups : dict
+        Per-sample read lengths and qscores, see `group_by_sample`.
+    color_map : dict
+        Mapping of sample name to (hex) color.
+    title : str
+        Figure title.
+    nbinsx : int, optional
+        Number of read length bins, by default 256.
+    nbinsy : int, optional
+        Number of qscore bins, by default 128.
+
+    Returns
+    -------
+    go.Figure
+    """
+    # keep the user's zoom when the bins are patched for the viewport
+    fig = go.Figure(layout=dict(title=title, uirevision="density"))
+    if not sample_groups:
+        return fig
+
+    xcenters, ycenters, counts = density_counts(
+        sample_groups, nbinsx=nbinsx, nbinsy=nbinsy
+    )
+    for name, sample_counts in counts.items():
+        r, g, b = hex_to_rgb(color_map[name])
+        fig.add_trace(
+            go.Heatmap(
+                x=xcenters,
+                y=ycenters,
+                z=sample_counts,
+                name=name,
+                legendgroup=name,
+                colorscale=[[0, f"rgba({r},{g},{b},0.2)"], [1, f"rgb({r},{g},{b})"]],
+                showscale=False,
+                showlegend=True,
+                hovertemplate=(
+                    "Read Length: %{x}<br>Average QScore: %{y}<br>"
+                    "Reads: %{z}<extra>%{fullData.name}</extra>"
+                ),
+            )
+        )
+    fig.update_layout(
+        xaxis_title="Read Length",
+        yaxis_title="Average QScore",
+        legend_title_text="sample_name",
+    )
+    return fig
+
+
+def scatter_figure(sample_groups, color_map, title):
+    """Plot read length vs. qscore with one WebGL scatter trace per sample.
+
+    WebGL draws all points on a single canvas instead of creating an SVG node per
+    point, which keeps rendering, panning and zooming responsive for many reads.
+
+    Parameters
+    ----------
+    sample_groups : dict
+        Per-sample read lengths and qscores, see `group_by_sample`.
+    color_map : dict
+        Mapping of sample name to color.
+    title : str
+        Figure title.
+
+    Returns
+    -------
+    go.Figure
+    """
+    # keep the user's zoom when the visibility of the traces is patched, so it stays
+    # in sync with the zoom the filtered table was last filtered on
+    fig = go.Figure(layout=dict(title=title, uirevision="scatter"))
+    for name, group in sample_groups.items():
+        fig.add_trace(
+            go.Scattergl(
+                x=group["rl"],
+                y=group["q"],
+                mode="markers",
+                name=name,
+                legendgroup=name,
+                marker_color=color_map[name],
+                hovertemplate=(
+                    "Read Length: %{x}<br>Average QScore: %{y}"
+                    "<extra>%{fullData.name}</extra>"
+                ),
+            )
+        )
+    fig.update_layout(
+        xaxis_title="Read Length",
+        yaxis_title="Average QScore",
+        legend_title_text="sample_name",
+        # hover lookups dominate interaction cost for dense point clouds: only
+        # look for the single closest point and don't draw spikes
+        hovermode="closest",
+        spikedistance=0,
+    )
+    return fig
+
+
+def add_marginal_histograms(fig, sample_groups, color_map, nbins=200):
+    """Add per-sample read length and qscore histograms in the margins of a figure.
+
+    The histograms are binned here (with bin edges shared by all samples) and drawn
+    as bar traces, so plotly.js neither receives the raw values nor bins them. The
+    main plot keeps the `x` / `y` axes; the read length histogram shares `x` and the
+    qscore histogram shares `y`.
+
+    Parameters
+    ----------
+    fig : go.Figure
+        Figure with the read length vs. qscore plot on its `x` / `y` axes.
+    sample_groups : dict
+        Per-sample read lengths and qscores, see `group_by_sample`.
+    color_map : dict
+        Mapping of sample name to color.
+    nbins : int, optional
+        Number of bins of each histogram, by default 200.
+
+    Returns
+    -------
+    go.Figure
+    """
+    xedges = np.linspace(*_value_range(sample_groups, "rl"), nbins + 1)
+    yedges = np.linspace(*_value_range(sample_groups, "q"), nbins + 1)
+    for name, group in sample_groups.items():
+        xcounts, _ = np.histogram(group["rl"], bins=xedges)
+        ycounts, _ = np.histogram(group["q"], bins=yedges)
+        bar_style = dict(
+            name=name, legendgroup=name, showlegend=False, marker_color=color_map[name]
+        )
+        fig.add_trace(
+            go.Bar(
+                x=(xedges[:-1] + xedges[1:]) / 2,
+                y=xcounts,
+                width=np.diff(xedges),
+                yaxis="y2",
+                **bar_style,
+            )
+        )
+        fig.add_trace(
+            go.Bar(
+                x=ycounts,
+                y=(yedges[:-1] + yedges[1:]) / 2,
+                width=np.diff(yedges),
+                orientation="h",
+                xaxis="x2",
+                **bar_style,
+            )
+        )
+    fig.update_layout(
+        barmode="relative",
+        bargap=0,
+        xaxis=dict(domain=[0, 0.8]),
+        yaxis=dict(domain=[0, 0.8]),
+        xaxis2=dict(domain=[0.82, 1], anchor="y"),
+        yaxis2=dict(domain=[0.82, 1], anchor="x"),
+    )
+    return fig
+
+
+def visibility_patch(trace_samples, selected_samples, hidden=False):
+    """Return a figure patch that only shows the traces of the selected samples.
+
+    The visibility of every trace is set, so traces hidden by clicking the legend
+    are shown again once their sample is selected.
+
+    Parameters
+    ----------
+    trace_samples : list
+        Sample (legend group) of each trace of the figure, in trace order.
+    selected_samples : list
+        Samples to show.
+    hidden : bool or str, optional
+        Visibility of the traces of the other samples, e.g. "legendonly" to keep
+        them in the legend, by default False.
+
+    Returns
+    -------
+    Patch
+    """
+    selected_samples = set(selected_samples or [])
+    patched_figure = Patch()
+    for i, name in enumerate(trace_samples):
+        patched_figure["data"][i]["visible"] = (
+            True if name in selected_samples else hidden
+        )
+    return patched_figure
+
+
+def relayout_ranges(relayout_data):
+    """Return the zoomed x- and y-range of a graph's relayoutData.
+
+    Parameters
+    ----------
+    relayout_data : dict
+        The graph's `relayoutData`, may be None.
+
+    Returns
+    -------
+    tuple
+        The x- and y-range as `(min, max)` tuples, each None if not zoomed.
+    """
+    ranges = []
+    for axis in ("xaxis", "yaxis"):
+        keys = f"{axis}.range[0]", f"{axis}.range[1]"
+        if relayout_data and all(key in relayout_data for key in keys):
+            ranges.append((relayout_data[keys[0]], relayout_data[keys[1]]))
+        else:
+            ranges.append(None)
+    return tuple(ranges)
+
+
+def range_positions(group, x_range=None, y_range=None):
+    """Return the row positions of one sample's reads within the axis ranges.
+
+    The sample's read lengths are sorted, so the x-range is found with a binary
+    search and only the reads within it are compared against the qscore range.
+
+    Parameters
+    ----------
+    group : dict
+        Read lengths, qscores and row positions of one sample, see
+        `group_by_sample`.
+    x_range : tuple, optional
+        Inclusive read length range, by default no read length filtering.
+    y_range : tuple, optional
+        Inclusive qscore range, by default no qscore filtering.
+
+    Returns
+    -------
+    np.ndarray
+    """
+    lo, hi = 0, len(group["idx"])
+    if x_range is not None:
+        lo = np.searchsorted(group["rl"], x_range[0], side="left")
+        hi = np.searchsorted(group["rl"], x_range[1], side="right")
+    positions = group["idx"][lo:hi]
+    if y_range is not None:
+        slice_qscores = group["q"][lo:hi]
+        mask = slice_qscores >= y_range[0]
+        mask &= slice_qscores <= y_range[1]
+        positions = positions[mask]
+    return positions
+
+
+def split_filter_part(filter_part):
+    """Split one part of a DataTable `filter_query` into column, operator and value.
+
+    Parameters
+    ----------
+    filter_part : str
+        A single filter expression, e.g. `{Read Length} >= 5000`.
+
+    Returns
+    -------
+    tuple
+        Column name, operator and value, or `(None, None, None)` if no operator
+        was found.
+    """
+    # only look for the operator after the column name, which may contain spaces
+    # (e.g. "Average QScore" contains "ge ")
+    name_part, _, expression = filter_part.partition("}")
+    name = name_part.split("{", 1)[-1]
+    for operator_type in FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator in expression:
+                value_part = expression.split(operator, 1)[1].strip()
+                v0 = value_part[0]
+                if v0 == value_part[-1] and v0 in ("'", '"', "`"):
+                    value = value_part[1:-1].replace("\\" + v0, v0)
+                elif operator_type[0] in ("contains ", "datestartswith "):
+                    # string matches, e.g. "0001" must not become "1.0"
+                    value = value_part
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+
+                # word operators need spaces after them in the filter string,
+                # but we don't want these later
+                return name, operator_type[0].strip(), value
+
+    return None, None, None
+
+
+def filter_and_sort(df, filter_query, sort_by):
+    """Apply a DataTable `filter_query` and `sort_by` to a DataFrame server-side.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame to filter and sort.
+    filter_query : str
+        DataTable filter query, e.g. `{sample_name} contains s1 && {Read Length} > 10`.
+    sort_by : list
+        DataTable `sort_by` property (list of `column_id` / `direction` dicts).
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    for filter_part in (filter_query or "").split(" && "):
+        col_name, operator, filter_value = split_filter_part(filter_part)
+        if col_name not in df.columns:
+            continue
+        column = df[col_name]
+        # Compare categoricals (which are unordered) by their string categories:
+        # once per category, rather than converting every row to a string
+        categorical = isinstance(column.dtype, pd.CategoricalDtype)
+        values = pd.Series(column.cat.categories.astype(str)) if categorical else column
+        try:
+            if operator in ("eq", "ne", "lt", "le", "gt", "ge"):
+                mask = getattr(values, operator)(filter_value)
+            elif operator == "contains":
+                mask = values.astype(str).str.contains(str(filter_value), regex=False)
+            elif operator == "datestartswith":
+                mask = values.astype(str).str.startswith(str(filter_value))
+            else:
+                continue
+        except (TypeError, ValueError):
+            # the value doesn't fit the column (e.g. `{sample_name} > 5`),
+            # ignore the clause rather than failing the callback
+            continue
+        if categorical:
+            # look up the rows' categories, missing values (code -1) never match
+            mask = np.append(mask.to_numpy(), False)[column.cat.codes.to_numpy()]
+        df = df.loc[mask]
+
+    if sort_by:
+        df = df.sort_values(
+            [col["column_id"] for col in sort_by],
+            ascending=[col["direction"] == "asc" for col in sort_by],
+            # categoricals would sort in category (i.e. input) order, sort them
+            # alphabetically like the other text columns
+            key=lambda column: (
+                column.cat.reorder_categories(sorted(column.cat.categories))
+                if isinstance(column.dtype, pd.CategoricalDtype)
+                else column
+            ),
+        )
+    return df
+
+
+def table_columns(df):
+    """Return DataTable column definitions, typed so numeric filters work.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame shown in the table.
+
+    Returns
+    -------
+    list
+    """
+    columns = []
+    for i in df.columns:
+        column = {
+            "name": i,
+            "id": i,
+            "type": "numeric" if pd.api.types.is_numeric_dtype(df[i]) else "text",
+        }
+        if pd.api.types.is_float_dtype(df[i]):
+            # float32 values are sent with float64 precision (e.g. 9.65999984741211)
+            column["format"] = Format(precision=2, scheme=Scheme.fixed)
+        columns.append(column)
+    return columns
+
+
+def table_page(df, page_current, page_size, positions=None):
+    """Return the records of one DataTable page and the total number of pages.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame shown in the table.
+    page_current : int
+        Index of the page, None for the first page.
+    page_size : int
+        Number of rows per page.
+    positions : np.ndarray, optional
+        If given, the table consists of the rows of `df` at these positions (in
+        that order), otherwise of all rows of `df`.
+
+    Returns
+    -------
+    tuple
+        The page's records and the number of pages.
+    """
+    start = (page_current or 0) * page_size
+    end = start + page_size
+    n_rows = len(df) if positions is None else len(positions)
+    page_count = max(1, math.ceil(n_rows / page_size))
+    if positions is None:
+        page = df.iloc[start:end]
+    else:
+        page = df.take(positions[start:end])
+    return page.to_dict("records"), page_count
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider encoding with `orjson` (including numpy arrays)."""
+
+    def dumps(self, obj, **kwargs):
+        """Serialise `obj` to a JSON string."""
+        return orjson.dumps(
+            obj,
+            default=self.default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        ).decode()
+
+    def loads(self, s, **kwargs):
+        """Deserialise a JSON string or bytes."""
+        return orjson.loads(s)
+
+
+def create_app(
+    per_read_stats_tsv,
+    dashboard_closed_file="dashboard_closed",
+    mid_threshold=5000,
+    long_threshold=10000,
+    density_threshold=50_000,
+    relayout_debounce_ms=RELAYOUT_DEBOUNCE_MS,
+    columns=PER_READ_STATS_COLUMNS,
+    share_data=False,
+):
+    """Create an interactive dashboard from a TSV file containing per-read statistics.
+
+    Parameters
+    ----------
+    per_read_stats_tsv : str
+        Path to the TSV file containing per-read statistics.
+    dashboard_closed_file : str, optional
+        Path to the file that will be created when the dashboard is closed, by default 'dashboard_closed'.
+    mid_threshold : int, optional
+        Initial mid read length threshold, by default 5000.
+    long_threshold : int, optional
+        Initial long read length threshold, by default 10000.
+    density_threshold : int, optional
+        Above this number of reads, the scatter plot is replaced by binned 2D
+        histograms and the violin plots only show outlier points, by default 50000.
+    relayout_debounce_ms : int, optional
+        Zooming the scatter plot only updates the filtered table once no further
+        zoom events arrived for this many milliseconds, by default 250.
+    columns : list, optional
+        Per-read stats columns to load (and show in the tables), by default
+        `PER_READ_STATS_COLUMNS`. Must include those.
+    share_data : bool, optional
+        Memory-map the prepared per-read stats from shared memory, so that several
+        server processes (e.g. gunicorn workers) share a single copy, see
+        `shared_per_read_stats`. By default False, i.e. the process loads its own
+        copy.
+
+    Returns
+    -------
+    Dash
+    """
+
+    app = Dash(__name__)
+    if orjson is not None:
+        # Dash encodes layouts and callback responses through plotly, Flask its own
+        # JSON responses: let both use orjson
+        pio.json.config.default_engine = "orjson"
+        app.server.json = OrjsonProvider(app.server)
+    if share_data:
+        df = shared_per_read_stats(per_read_stats_tsv, columns)
+    else:
+        df = prepare_per_read_stats(per_read_stats_tsv, columns)
+
+    # Create a color map for sample names (categories are in order of appearance)
+    sample_names = df["sample_name"].cat.categories.tolist()
+    sample_options = [{"label": name, "value": name} for name in sample_names]
     colors = px.colors.qualitative.Plotly  # Using Plotly's qualitative color scale
     color_map = {name: colors[i % len(colors)] for i, name in enumerate(sample_names)}
 
+    read_lengths = df["Read Length"].to_numpy()
+    qscores = df["Average QScore"].to_numpy()
+
+    # Per-sample arrays, so callbacks can gather the selected rows directly instead
+    # of hashing the full `sample_name` column with `isin` on every call
+    sample_groups = group_by_sample(df)
+
+    def filtered_positions(selected_samples, x_range=None, y_range=None):
+        """Return the sorted row positions of selected reads within the axis ranges."""
+        positions = [
+            range_positions(sample_groups[name], x_range, y_range)
+            for name in selected_samples or []
+        ]
+        if not positions:
+            return np.array([], dtype=np.intp)
+        # merge the (individually sorted) per-sample positions
+        return np.sort(np.concatenate(positions), kind="stable")
+
+    # Page turns and revisited selections / zoom states reuse the filtered (and
+    # sorted) row positions instead of filtering and sorting the data again
+    @lru_cache(maxsize=4)
+    def filtered_table_positions(selected_samples, x_range, y_range, sort_by):
+        """Return the row positions of the filtered table, in table order."""
+        positions = filtered_positions(list(selected_samples), x_range, y_range)
+        if sort_by:
+            sort_columns = list(dict.fromkeys(column for column, _ in sort_by))
+            positions = filter_and_sort(
+                df[sort_columns].take(positions),
+                None,
+                [{"column_id": c, "direction": d} for c, d in sort_by],
+            ).index.to_numpy()
+        # the cached array is shared between callbacks
+        positions.flags.writeable = False
+        return positions
+
+    def violin_points(n_reads):
+        """Only draw the outlier points of the violins for large numbers of reads."""
+        return "outliers" if n_reads > density_threshold else "all"
+
+    # The scatter plot holds one trace (group) per sample and is only built once;
+    # changing the sample selection just toggles the visibility of its traces
+    if len(df) > density_threshold:
+        # Too many points to send to the browser, bin them on the server instead
+        scatter_fig = binned_density_figure(
+            sample_groups, color_map, title="Quality Score over Read Length"
+        )
+    else:
+        scatter_fig = scatter_figure(
+            sample_groups, color_map, title="Quality Score over Read Length"
+        )
+    add_marginal_histograms(scatter_fig, sample_groups, color_map)
+    scatter_trace_samples = [trace.legendgroup for trace in scatter_fig.data]
+
+    # The violin figure holds all samples (changing the selection only toggles the
+    # visibility of their traces) and is cached on the thresholds: the data never
+    # changes while the dashboard runs, so revisiting thresholds returns the
+    # previously built figure instead of rebuilding it. It is cached in its
+    # serialised form (with the arrays already encoded), so a cache hit doesn't
+    # copy, validate and encode the figure again.
+    @lru_cache(maxsize=4)
+    def violin_qscore_figure(mid_threshold, long_threshold):
+        """Build the qscore violin plot faceted by read length category."""
+        # Pass only the plotted columns rather than the full-width DataFrame
+        categories = categorise_read_lengths(
+            read_lengths, mid_threshold, long_threshold
+        )
+        # one facet row per category with reads of any sample
+        num_categories = np.count_nonzero(
+            np.bincount(categories.codes, minlength=len(READ_LENGTH_CATEGORIES))
+        )
+        violin_data = {
+            "sample_name": df["sample_name"].to_numpy(),
+            "Average QScore": qscores,
+            "Read Length Category": categories,
+        }
+
+        fig = px.violin(
+            violin_data,
+            x="sample_name",
+            y="Average QScore",
+            color="sample_name",
+            color_discrete_map=color_map,
+            facet_row="Read Length Category",
+            title="Quality Score over Read Length by Sample",
+            height=max(300, 200 * num_categories),
+            points=violin_points(len(df)),
+            box=True,
+        )
+
+        fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1].strip()))
+
+        fig.update_layout(margin=dict(l=40, r=40, t=40, b=80))
+
+        return json.loads(fig.to_json())
+
     # Define categories for read length
-    df["Read Length Category"] = pd.cut(
-        df["Read Length"],
-        bins=[0, mid_threshold, long_threshold, float("inf")],
-        labels=["short reads", "mid reads", "long reads"],
+    df["Read Length Category"] = categorise_read_lengths(
+        df["Read Length"], mid_threshold, long_threshold
     )
 
+    initial_page, initial_page_count = table_page(df, 0, TABLE_PAGE_SIZE)
+
+    # Paging through the overview table reuses the filtered and sorted row positions
+    # instead of filtering and sorting the full frame for every page
+    @lru_cache(maxsize=4)
+    def overview_table_positions(filter_query, sort_by):
+        """Return the row positions of the overview table, in table order."""
+        positions = filter_and_sort(
+            df,
+            filter_query,
+            [{"column_id": c, "direction": d} for c, d in sort_by],
+        ).index.to_numpy()
+        # the cached array is shared between callbacks
+        positions.flags.writeable = False
+        return positions
+
     app.layout = html.Div(
         [
             html.Div(
@@ -120,36 +1133,38 @@ def generate_dashboard(
                     html.Summary("Data Table"),
                     dash_table.DataTable(
                         id="overview-table",
-                        columns=[{"name": i, "id": i} for i in df.columns],
-                        data=df.to_dict("records"),
-                        sort_action="native",
+                        columns=table_columns(df),
+                        # the first page of both tables is the same
+                        data=initial_page,
+                        page_count=initial_page_count,
+                        # page, sort and filter server-side rather than shipping
+                        # every row to the browser
+                        page_action="custom",
+                        page_current=0,
+                        page_size=TABLE_PAGE_SIZE,
+                        sort_action="custom",
                         sort_mode="multi",
-                        filter_action="native",  # Enable filtering
+                        sort_by=[],
+                        filter_action="custom",  # Enable filtering
+                        filter_query="",
                     ),
                 ]
             ),
             html.H3("Interactive Analysis"),
             dcc.Dropdown(
                 id="sample-dropdown",
-                options=[{"label": i, "value": i} for i in df["sample_name"].unique()],
-                value=df["sample_name"].unique().tolist(),
+                options=sample_options,
+                value=sample_names,
                 multi=True,
             ),
             html.Button("Select All", id="select-all-button", n_clicks=0),
             html.Button("Deselect All", id="deselect-all-button", n_clicks=0),
             dcc.Graph(
                 id="scatter-plot-read-length-qscore",
-                figure=px.scatter(
-                    df,
-                    x="Read Length",
-                    y="Average QScore",
-                    color="sample_name",
-                    color_discrete_map=color_map,
-                    title="Quality Score over Read Length",
-                    marginal_x="histogram",
-                    marginal_y="histogram",
-                ),
+                figure=scatter_fig,
             ),
+            # last zoom of the scatter plot, see the debouncing callback below
+            dcc.Store(id="debounced-relayout"),
             html.Details(
                 [
                     html.Summary("Data Table for Scatterplot"),
@@ -167,12 +1182,24 @@ def generate_dashboard(
                             ),
                         ]
                     ),
-                    dash_table.DataTable(
-                        id="filtered-data-table",
-                        columns=[{"name": i, "id": i} for i in df.columns],
-                        data=df.to_dict("records"),  # Initially show all data
-                        sort_action="native",
-                        sort_mode="multi",
+                    # keep showing the (dimmed) current page while a new one is
+                    # computed, if that takes long enough to be noticeable
+                    dcc.Loading(
+                        dash_table.DataTable(
+                            id="filtered-data-table",
+                            columns=table_columns(df),
+                            data=initial_page,  # first page of all reads
+                            page_count=initial_page_count,
+                            page_action="custom",
+                            page_current=0,
+                            page_size=TABLE_PAGE_SIZE,
+                            sort_action="custom",
+                            sort_mode="multi",
+                            sort_by=[],
+                        ),
+                        target_components={"filtered-data-table": "data"},
+                        overlay_style={"visibility": "visible", "opacity": 0.5},
+                        delay_show=200,
                     ),
                 ]
             ),
@@ -206,17 +1233,7 @@ def generate_dashboard(
             ),
             dcc.Graph(
                 id="violin-plot-qscore-read-length",
-                figure=px.violin(
-                    df,
-                    x="sample_name",
-                    y="Average QScore",
-                    color="sample_name",
-                    color_discrete_map=color_map,
-                    facet_row="Read Length Category",  # Facet into rows based on read length categories
-                    title="Quality Score over Read Length by Sample",
-                    points="all",
-                    box=True,
-                ),
+                figure=violin_qscore_figure(mid_threshold, long_threshold),
             ),
             dcc.Graph(
                 id="violin-plot-read-length",
@@ -227,7 +1244,7 @@ def generate_dashboard(
                     color="sample_name",
                     color_discrete_map=color_map,
                     title="Read Length by Sample",
-                    points="all",
+                    points=violin_points(len(df)),
                     box=True,
                 ),
             ),
@@ -241,124 +1258,204 @@ def generate_dashboard(
             Input("long-threshold", "value"),
             Input("sample-dropdown", "value"),
         ],
+        prevent_initial_call=True,
     )
     def update_violin_plot_qscore_read_length(
         mid_threshold, long_threshold, selected_samples
     ):
-        if not selected_samples:
-            return px.violin()
+        # keep the current plot while the thresholds are incomplete or out of order
+        if (
+            mid_threshold is None
+            or long_threshold is None
+            or mid_threshold >= long_threshold
+        ):
+            return no_update
 
-        # Filter DataFrame based on selected samples
-        filtered_df = df[df["sample_name"].isin(selected_samples)]
+        fig = violin_qscore_figure(mid_threshold, long_threshold)
+        trace_samples = [trace.get("legendgroup") for trace in fig["data"]]
 
-        # Update the DataFrame with new thresholds for read length categories
-        filtered_df["Read Length Category"] = pd.cut(
-            filtered_df["Read Length"],
-            bins=[0, mid_threshold, long_threshold, float("inf")],
-            labels=["short reads", "mid reads", "long reads"],
-        )
+        # A new selection only needs a visibility patch, plotly.js keeps the data;
+        # like in the scatter plot, deselected samples stay in the legend. Hidden
+        # traces keep their facet rows, so the figure keeps its height.
+        if callback_context.triggered[0]["prop_id"] == "sample-dropdown.value":
+            return visibility_patch(
+                trace_samples, selected_samples, hidden="legendonly"
+            )
 
-        # Calculate the number of unique categories for setting plot height
-        num_categories = len(filtered_df["Read Length Category"].unique())
-        plot_height = max(300, 200 * num_categories)
+        # New thresholds need the new figure; only copy the (small) trace dicts to
+        # set their visibility and keep the cached figure intact
+        selected_samples = selected_samples or []
+        return {
+            **fig,
+            "data": [
+                {
+                    **trace,
+                    "visible": True if sample in selected_samples else "legendonly",
+                }
+                for trace, sample in zip(fig["data"], trace_samples)
+            ],
+        }
 
-        fig = px.violin(
-            filtered_df,
-            x="sample_name",
-            y="Average QScore",
-            color="sample_name",
-            color_discrete_map=color_map,
-            facet_row="Read Length Category",
-            title="Quality Score over Read Length by Sample",
-            height=plot_height,
-            points="all",
-            box=True,
+    @app.callback(
+        Output("scatter-plot-read-length-qscore", "figure"),
+        Input("sample-dropdown", "value"),
+        prevent_initial_call=True,
+    )
+    def update_graph(selected_samples):
+        # Only patch the visibility of the traces, plotly.js keeps their data;
+        # deselected samples stay in the legend
+        return visibility_patch(
+            scatter_trace_samples, selected_samples, hidden="legendonly"
         )
 
-        fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1].strip()))
-
-        fig.update_layout(margin=dict(l=40, r=40, t=40, b=80))
-
-        return fig
-
     @app.callback(
-        Output("scatter-plot-read-length-qscore", "figure"),
         [
-            Input("sample-dropdown", "value"),
-            Input("scatter-plot-read-length-qscore", "relayoutData"),
+            Output("overview-table", "data"),
+            Output("overview-table", "page_count"),
+            Output("overview-table", "page_current"),
+        ],
+        [
+            Input("overview-table", "page_current"),
+            Input("overview-table", "page_size"),
+            Input("overview-table", "sort_by"),
+            Input("overview-table", "filter_query"),
         ],
+        prevent_initial_call=True,
     )
-    def update_graph(selected_samples, relayoutData):
-        filtered_df = df[df["sample_name"].isin(selected_samples)]
-
-        # Check if there is zoom data in relayoutData
-        if (
-            relayoutData
-            and "xaxis.range[0]" in relayoutData
-            and "yaxis.range[0]" in relayoutData
+    def update_overview_table(page_current, page_size, sort_by, filter_query):
+        # When the filter or sorting changes, go back to the first page: the
+        # current one may no longer exist
+        page_reset = no_update
+        if not any(
+            trigger["prop_id"] == "overview-table.page_current"
+            for trigger in callback_context.triggered
         ):
-            x0, x1 = relayoutData["xaxis.range[0]"], relayoutData["xaxis.range[1]"]
-            y0, y1 = relayoutData["yaxis.range[0]"], relayoutData["yaxis.range[1]"]
-            filtered_df = filtered_df[
-                (filtered_df["Read Length"] >= x0)
-                & (filtered_df["Read Length"] <= x1)
-                & (filtered_df["Average QScore"] >= y0)
-                & (filtered_df["Average QScore"] <= y1)
-            ]
+            page_current = page_reset = 0
 
-        return px.scatter(
-            filtered_df,
-            x="Read Length",
-            y="Average QScore",
-            color="sample_name",
-            color_discrete_map=color_map,
-            title="Quality Score over Read Length",
-            marginal_x="histogram",
-            marginal_y="histogram",
+        positions = None
+        if filter_query or sort_by:
+            positions = overview_table_positions(
+                filter_query,
+                tuple((col["column_id"], col["direction"]) for col in sort_by or []),
+            )
+        data, page_count = table_page(df, page_current, page_size, positions)
+        return data, page_count, page_reset
+
+    # Plotly emits relayoutData continuously while dragging and also for e.g.
+    # autosize or dragmode changes. Only pass on zoom changes (or zoom resets) to
+    # the server, and only once no further events arrived for a while.
+    app.clientside_callback(
+        """
+        function(relayoutData) {
+            const zoomed = Object.keys(relayoutData || {}).some(
+                key => /^[xy]axis\\.(range|autorange)/.test(key)
+            );
+            if (!zoomed) {
+                return dash_clientside.no_update;
+            }
+            // drop the pending event (if any) in favour of this one
+            const state = window.relayoutDebounce = window.relayoutDebounce || {};
+            if (state.timer) {
+                clearTimeout(state.timer);
+                state.resolve(dash_clientside.no_update);
+            }
+            return new Promise(resolve => {
+                state.resolve = resolve;
+                state.timer = setTimeout(() => {
+                    state.timer = null;
+                    resolve(relayoutData);
+                }, %d);
+            });
+        }
+        """ % relayout_debounce_ms,
+        Output("debounced-relayout", "data"),
+        Input("scatter-plot-read-length-qscore", "relayoutData"),
+    )
+
+    if len(df) > density_threshold:
+
+        @app.callback(
+            Output("scatter-plot-read-length-qscore", "figure", allow_duplicate=True),
+            Input("debounced-relayout", "data"),
+            prevent_initial_call=True,
         )
+        def update_density_bins(relayout_data):
+            # Re-bin the reads for the viewport, so zooming in reveals more detail
+            # while still only sending the bin counts to the browser
+            xcenters, ycenters, counts = density_counts(
+                sample_groups, *relayout_ranges(relayout_data)
+            )
+            patched_fig = Patch()
+            # the heatmaps are the first traces, one per sample
+            for i, sample_counts in enumerate(counts.values()):
+                patched_fig["data"][i]["x"] = xcenters
+                patched_fig["data"][i]["y"] = ycenters
+                patched_fig["data"][i]["z"] = sample_counts
+            return patched_fig
 
     @app.callback(
-        Output("filtered-data-table", "data"),
+        [
+            Output("filtered-data-table", "data"),
+            Output("filtered-data-table", "page_count"),
+            Output("filtered-data-table", "page_current"),
+        ],
         [
             Input("sample-dropdown", "value"),
-            Input("scatter-plot-read-length-qscore", "relayoutData"),
+            Input("debounced-relayout", "data"),
             Input("scatter-plot-read-length-qscore", "selectedData"),
+            Input("filtered-data-table", "page_current"),
+            Input("filtered-data-table", "page_size"),
+            Input("filtered-data-table", "sort_by"),
         ],
+        prevent_initial_call=True,
     )
-    def update_filtered_table(selected_samples, relayoutData, selectedData):
-        # Filter DataFrame based on selected samples from the dropdown
-        filtered_df = df[df["sample_name"].isin(selected_samples)]
-
-        # Check if the callback was triggered by a change in the dropdown
-        if (
-            callback_context.triggered
-            and callback_context.triggered[0]["prop_id"] == "sample-dropdown.value"
-        ):
-            # Reset any zoom filtering as the plot zooms out
-            relayoutData = None
-
+    def update_filtered_table(
+        selected_samples, relayoutData, selectedData, page_current, page_size, sort_by
+    ):
         # Apply zoom filtering if zoom level changes are detected in relayoutData
-        if relayoutData:
-            if "xaxis.range[0]" in relayoutData and "xaxis.range[1]" in relayoutData:
-                x0, x1 = relayoutData["xaxis.range[0]"], relayoutData["xaxis.range[1]"]
-                filtered_df = filtered_df[
-                    (filtered_df["Read Length"] >= x0)
-                    & (filtered_df["Read Length"] <= x1)
-                ]
+        x_range, y_range = relayout_ranges(relayoutData)
 
-            if "yaxis.range[0]" in relayoutData and "yaxis.range[1]" in relayoutData:
-                y0, y1 = relayoutData["yaxis.range[0]"], relayoutData["yaxis.range[1]"]
-                filtered_df = filtered_df[
-                    (filtered_df["Average QScore"] >= y0)
-                    & (filtered_df["Average QScore"] <= y1)
-                ]
+        # Filter DataFrame based on selected samples from the dropdown and the zoom
+        positions = filtered_table_positions(
+            tuple(sorted(selected_samples or [])),
+            x_range,
+            y_range,
+            tuple((col["column_id"], col["direction"]) for col in sort_by or []),
+        )
 
         # Apply filtering based on selected hue labels in the scatter plot
         # TODO: implement this
 
-        return filtered_df.to_dict("records")
+        # When the filtered rows change (rather than the table's own paging or
+        # sorting), go back to the first page: the current one may no longer exist
+        page_reset = no_update
+        if not any(
+            trigger["prop_id"].startswith("filtered-data-table.")
+            for trigger in callback_context.triggered
+        ):
+            page_current = page_reset = 0
 
-    @app.callback(
+        # Only send the requested page to the browser
+        data, page_count = table_page(df, page_current, page_size, positions)
+        return data, page_count, page_reset
+
+    # Runs in the browser, selecting / deselecting doesn't need a server round-trip
+    app.clientside_callback(
+        """
+        function(select_all_clicks, deselect_all_clicks, options) {
+            const triggered = dash_clientside.callback_context.triggered;
+            if (!triggered.length) {
+                return dash_clientside.no_update;
+            }
+            const button_id = triggered[0].prop_id.split(".")[0];
+            if (button_id === "select-all-button") {
+                return options.map(option => option.value);
+            } else if (button_id === "deselect-all-button") {
+                return [];
+            }
+            return dash_clientside.no_update;
+        }
+        """,
         Output("sample-dropdown", "value"),
         [
             Input("select-all-button", "n_clicks"),
@@ -366,16 +1463,6 @@ def generate_dashboard(
         ],
         [State("sample-dropdown", "options")],
     )
-    def update_dropdown(select_all_clicks, deselect_all_clicks, options):
-        ctx = callback_context
-        if not ctx.triggered:
-            return no_update
-        button_id = ctx.triggered[0]["prop_id"].split(".")[0]
-        if button_id == "select-all-button":
-            return [option["value"] for option in options]
-        elif button_id == "deselect-all-button":
-            return []
-        return no_update
 
     @app.callback(
         Output("export-button", "children"),
@@ -424,19 +1511,24 @@ def generate_dashboard(
 
             os.makedirs(save_path, exist_ok=True)
 
-            try:
-                write_image(
+            # each export starts its own kaleido process, run them concurrently
+            exports = [
+                (
                     scatter_qscore_read_length_fig,
                     os.path.join(save_path, scatter_qscore_read_length_path),
-                )
-                write_image(
+                ),
+                (
                     violin_qscore_read_length_fig,
                     os.path.join(save_path, violin_qscore_read_length_path),
-                )
-                write_image(
+                ),
+                (
                     violin_read_length_fig,
                     os.path.join(save_path, violin_read_length_path),
-                )
+                ),
+            ]
+            try:
+                with ThreadPoolExecutor(max_workers=len(exports)) as executor:
+                    list(executor.map(lambda args: write_image(*args), exports))
             except Exception as e:
                 print(f"Failed to save plot images: {e}")
 
@@ -446,12 +1538,13 @@ def generate_dashboard(
         Output("export-read-ids-button", "children"),
         [Input("export-read-ids-button", "n_clicks")],
         [
-            State("overview-table", "derived_virtual_data"),
+            State("overview-table", "filter_query"),
+            State("overview-table", "sort_by"),
             State("save-path-input", "value"),
         ],
         prevent_initial_call=True,
     )
-    def export_read_ids(n_clicks, rows, save_path):
+    def export_read_ids(n_clicks, filter_query, sort_by, save_path):
         if n_clicks > 0:
             if not save_path:
                 return html.Div(
@@ -464,7 +1557,8 @@ def generate_dashboard(
                     ]
                 )
 
-            read_ids = [row["read_id"] for row in rows] if rows else []
+            # the table only holds the current page, so re-apply its filters
+            read_ids = filter_and_sort(df, filter_query, sort_by)["read_id"].tolist()
             try:
                 os.makedirs(os.path.dirname(save_path), exist_ok=True)
                 with open(save_path, "w") as file:
@@ -480,13 +1574,103 @@ def generate_dashboard(
     )
     def close_dashboard(n_clicks):
         if n_clicks:
-            with open(dashboard_closed_file, "w") as file:
-                file.write("Dashboard was closed at: " + str(pd.Timestamp.now()))
+            # write to a (uniquely named) temporary file next to it first, so
+            # nothing watching for the file sees it half-written, even if several
+            # requests close the dashboard at once
+            closed_dir = os.path.dirname(os.path.abspath(dashboard_closed_file))
+            with tempfile.NamedTemporaryFile(
+                "w", dir=closed_dir, suffix=".tmp", delete=False
+            ) as file:
+                file.write(
+                    f"Dashboard was closed at: {time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+                )
+            os.replace(file.name, dashboard_closed_file)
         return None
 
-    app.run_server(debug=True)
+    return app
+
+
+def create_server(per_read_stats_tsv, **kwargs):
+    """Return the Flask server of the dashboard, e.g. for serving with gunicorn.
+
+    ```
+    gunicorn -w 4 'generate_dashboard:create_server("stats.tsv")'
+    ```
+
+    The workers share the per-read stats through shared memory (unless `share_data`
+    is set to False), see `shared_per_read_stats`. Keyword arguments are passed on
+    to `create_app`.
+    """
+    kwargs.setdefault("share_data", True)
+    return create_app(per_read_stats_tsv, **kwargs).server
+
+
+def generate_dashboard(per_read_stats_tsv, debug=False, **kwargs):
+    """Generate and serve an interactive dashboard from per-read statistics.
+
+    The dashboard is served by the threaded Flask server, so concurrent callbacks
+    are handled in parallel. Keyword arguments are passed on to `create_app`.
+
+    Parameters
+    ----------
+    per_read_stats_tsv : str
+        Path to the TSV file containing per-read statistics.
+    debug : bool, optional
+        Serve with Dash's dev tools (e.g. the callback graph and prop checks), by
+        default False. The reloader and hot reloading stay off regardless: they
+        would load the data twice and watch the files for changes.
+
+    Returns
+    -------
+    None
+    """
+    app = create_app(per_read_stats_tsv, **kwargs)
+    app.run(
+        debug=debug,
+        threaded=True,
+        use_reloader=False,
+        dev_tools_hot_reload=False,
+    )
+
+
+def argparser():
+    """Argument parser for entrypoint."""
+    parser = argparse.ArgumentParser(
+        "generate_dashboard",
+        description="Serve an interactive dashboard of per-read statistics.",
+    )
+    parser.add_argument(
+        "per_read_stats_tsv", help="TSV file containing per-read statistics."
+    )
+    parser.add_argument(
+        "--extra_columns",
+        nargs="+",
+        default=[],
+        help=(
+            "Additional per-read stats columns to load and show in the tables, "
+            "e.g. 'runid channel'. By default only the columns used by the plots "
+            "and the read IDs are loaded."
+        ),
+    )
+    parser.add_argument(
+        "--dashboard_closed_file",
+        default="dashboard_closed",
+        help="File created when the dashboard is closed.",
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Serve with Dash's dev tools enabled, for development only.",
+    )
+    return parser
 
 
 if __name__ == "__main__":
-    csv_file = sys.argv[1]
-    generate_dashboard(csv_file)
+    args = argparser().parse_args()
+    generate_dashboard(
+        args.per_read_stats_tsv,
+        debug=args.debug,
+        dashboard_closed_file=args.dashboard_closed_file,
+        columns=PER_READ_STATS_COLUMNS
+        + [c for c in args.extra_columns if c not in PER_READ_STATS_COLUMNS],
+    )
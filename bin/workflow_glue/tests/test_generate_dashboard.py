@@ -0,0 +1,315 @@
+"""Test the data helpers of generate_dashboard.py."""
+
+import generate_dashboard as dashboard
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def per_read_stats():
+    """Define a small per-read stats frame, sorted by read length."""
+    df = pd.DataFrame(
+        {
+            "read_id": [f"read{i}" for i in range(6)],
+            # categories in order of appearance, like pyarrow dictionary columns
+            "sample_name": pd.Categorical(
+                ["s3", "s1", "s2", "s3", "s1", "s2"], categories=["s3", "s1", "s2"]
+            ),
+            "Read Length": np.array([10, 20, 30, 40, 50, 60], dtype=np.uint32),
+            "Average QScore": np.array(
+                [12.5, 8.0, 20.0, 15.0, 9.5, 11.0], dtype=np.float32
+            ),
+        }
+    )
+    return df
+
+
+@pytest.mark.parametrize(
+    "filter_part,expected",
+    [
+        ("{Read Length} ge 5000", ("Read Length", "ge", 5000.0)),
+        ("{Read Length} >= 5000", ("Read Length", "ge", 5000.0)),
+        # "Average QScore" contains "ge " and "ne "
+        ("{Average QScore} < 10", ("Average QScore", "lt", 10.0)),
+        ("{sample_name} eq s1", ("sample_name", "eq", "s1")),
+        ('{sample_name} = "s 1"', ("sample_name", "eq", "s 1")),
+        ("{read_id} contains 0001", ("read_id", "contains", "0001")),
+        ("{start_time} datestartswith 2024", ("start_time", "datestartswith", "2024")),
+        ("", (None, None, None)),
+    ],
+)
+def test_split_filter_part(filter_part, expected):
+    """Test parsing single DataTable filter expressions."""
+    assert dashboard.split_filter_part(filter_part) == expected
+
+
+@pytest.mark.parametrize(
+    "filter_query,expected_ids",
+    [
+        ("", [0, 1, 2, 3, 4, 5]),
+        ("{Read Length} > 30", [3, 4, 5]),
+        ("{Read Length} le 30 && {Average QScore} ge 10", [0, 2]),
+        ("{sample_name} eq s1", [1, 4]),
+        ("{sample_name} ne s1", [0, 2, 3, 5]),
+        ("{read_id} contains 3", [3]),
+        ("{sample_name} contains 3", [0, 3]),
+        ("{sample_name} lt s2", [1, 4]),
+        ("{Read Length} > 30 && {sample_name} eq s1", [4]),
+        ("{unknown} > 3", [0, 1, 2, 3, 4, 5]),
+        # mismatched values are ignored rather than raising
+        ("{sample_name} > 5", [0, 1, 2, 3, 4, 5]),
+        ("{Read Length} > abc", [0, 1, 2, 3, 4, 5]),
+        ("{Read Length} > abc && {Read Length} < 25", [0, 1]),
+    ],
+)
+def test_filter(per_read_stats, filter_query, expected_ids):
+    """Test server-side filtering of the tables."""
+    filtered = dashboard.filter_and_sort(per_read_stats, filter_query, None)
+    assert filtered["read_id"].tolist() == [f"read{i}" for i in expected_ids]
+
+
+@pytest.mark.parametrize(
+    "sort_by,expected_ids",
+    [
+        ([], [0, 1, 2, 3, 4, 5]),
+        ([{"column_id": "Average QScore", "direction": "desc"}], [2, 3, 0, 5, 4, 1]),
+        # categoricals sort alphabetically, not in category order
+        (
+            [
+                {"column_id": "sample_name", "direction": "asc"},
+                {"column_id": "Read Length", "direction": "desc"},
+            ],
+            [4, 1, 5, 2, 3, 0],
+        ),
+        (
+            [
+                {"column_id": "sample_name", "direction": "desc"},
+                {"column_id": "Read Length", "direction": "asc"},
+            ],
+            [0, 3, 2, 5, 1, 4],
+        ),
+    ],
+)
+def test_sort(per_read_stats, sort_by, expected_ids):
+    """Test server-side sorting of the tables."""
+    sorted_df = dashboard.filter_and_sort(per_read_stats, None, sort_by)
+    assert sorted_df["read_id"].tolist() == [f"read{i}" for i in expected_ids]
+
+
+def test_categorise_read_lengths():
+    """Test the right-inclusive read length categories."""
+    categories = dashboard.categorise_read_lengths([0, 1, 100, 101, 200, 201], 100, 200)
+    assert list(categories) == [
+        "short reads",
+        "short reads",
+        "short reads",
+        "mid reads",
+        "mid reads",
+        "long reads",
+    ]
+    assert list(categories.categories) == dashboard.READ_LENGTH_CATEGORIES
+
+
+@pytest.mark.parametrize("mid_threshold,long_threshold", [(200, 100), (100, 100)])
+def test_categorise_read_lengths_bad_thresholds(mid_threshold, long_threshold):
+    """Test that out-of-order thresholds are rejected."""
+    with pytest.raises(ValueError, match="must be below"):
+        dashboard.categorise_read_lengths([1, 2, 3], mid_threshold, long_threshold)
+
+
+def test_uniform_bin_counts():
+    """Test that binning matches `np.histogram2d`."""
+    rng = np.random.default_rng(42)
+    x = np.sort(rng.integers(0, 1025, 10_000)).astype(np.uint32)
+    y = rng.uniform(-4, 36, 10_000).astype(np.float32)
+    # include values on the edges of the bins and the ranges
+    y[:5] = [0, 16, 32, 31.5, 0.5]
+    counts = dashboard.uniform_bin_counts(x, y, (0, 1024), (0, 32), 64, 32)
+    expected, _, _ = np.histogram2d(
+        x, y, bins=[np.linspace(0, 1024, 65), np.linspace(0, 32, 33)]
+    )
+    np.testing.assert_array_equal(counts, expected)
+
+
+def test_uniform_bin_counts_single_value():
+    """Test binning when all values are the same."""
+    counts = dashboard.uniform_bin_counts(
+        np.array([5, 5, 5]), np.array([1.0, 2.0, 3.0]), (5, 5), (1, 3), 4, 2
+    )
+    assert counts.shape == (4, 2)
+    assert counts[0].tolist() == [1, 2]
+    assert counts.sum() == 3
+
+
+def test_density_counts(per_read_stats):
+    """Test the per-sample heatmap counts, optionally within a viewport."""
+    sample_groups = dashboard.group_by_sample(per_read_stats)
+    xcenters, ycenters, counts = dashboard.density_counts(
+        sample_groups, nbinsx=5, nbinsy=4
+    )
+    assert list(counts) == ["s3", "s1", "s2"]
+    assert len(xcenters) == 5 and len(ycenters) == 4
+    # counts have qscore bins as rows, empty bins are NaN
+    assert counts["s1"].shape == (4, 5)
+    assert np.nansum(counts["s1"]) == 2
+    assert np.isnan(counts["s1"]).sum() == 18
+
+    _, _, zoomed = dashboard.density_counts(
+        sample_groups, x_range=(15, 45), y_range=(10, 20), nbinsx=3, nbinsy=2
+    )
+    assert {name: np.nansum(c) for name, c in zoomed.items()} == {
+        "s3": 1,
+        "s1": 0,
+        "s2": 1,
+    }
+
+
+@pytest.mark.parametrize(
+    "x_range,y_range,expected",
+    [
+        (None, None, [1, 4]),
+        ((20, 49), None, [1]),
+        ((21, 50), None, [4]),
+        (None, (9, 20), [4]),
+        ((0, 100), (7, 8), [1]),
+        ((100, 200), None, []),
+    ],
+)
+def test_range_positions(per_read_stats, x_range, y_range, expected):
+    """Test selecting one sample's reads within inclusive axis ranges."""
+    group = dashboard.group_by_sample(per_read_stats)["s1"]
+    positions = dashboard.range_positions(group, x_range, y_range)
+    assert positions.tolist() == expected
+
+
+@pytest.mark.parametrize(
+    "relayout_data,expected",
+    [
+        (None, (None, None)),
+        ({"autosize": True}, (None, None)),
+        ({"xaxis.autorange": True, "yaxis.autorange": True}, (None, None)),
+        ({"xaxis.range[0]": 1, "xaxis.range[1]": 2}, ((1, 2), None)),
+        (
+            {
+                "xaxis.range[0]": 1,
+                "xaxis.range[1]": 2,
+                "yaxis.range[0]": 3,
+                "yaxis.range[1]": 4,
+            },
+            ((1, 2), (3, 4)),
+        ),
+        # zooming the marginal histograms doesn't filter
+        ({"xaxis2.range[0]": 1, "xaxis2.range[1]": 2}, (None, None)),
+    ],
+)
+def test_relayout_ranges(relayout_data, expected):
+    """Test extracting the zoom from a graph's relayoutData."""
+    assert dashboard.relayout_ranges(relayout_data) == expected
+
+
+def test_table_page(per_read_stats):
+    """Test paging through all rows or the rows at given positions."""
+    records, page_count = dashboard.table_page(per_read_stats, 1, 4)
+    assert page_count == 2
+    assert [r["read_id"] for r in records] == ["read4", "read5"]
+
+    records, page_count = dashboard.table_page(per_read_stats, None, 4)
+    assert [r["read_id"] for r in records] == [f"read{i}" for i in range(4)]
+
+    records, page_count = dashboard.table_page(
+        per_read_stats, 0, 2, positions=np.array([5, 0, 3])
+    )
+    assert page_count == 2
+    assert [r["read_id"] for r in records] == ["read5", "read0"]
+
+    # an empty table still has one (empty) page
+    records, page_count = dashboard.table_page(
+        per_read_stats, 0, 2, positions=np.array([], dtype=np.intp)
+    )
+    assert records == [] and page_count == 1
+
+
+@pytest.fixture
+def per_read_stats_tsv(tmp_path):
+    """Write a small fastcat per-read stats TSV."""
+    path = tmp_path / "per-read-stats.tsv"
+    path.write_text(
+        "read_id\tfilename\tsample_name\tread_length\tmean_quality\n"
+        "r0\ta.fastq\ts2\t300\t12.5\n"
+        "r1\ta.fastq\ts1\t100\t8.25\n"
+        "r2\tb.fastq\ts2\t200\t20.0\n"
+    )
+    return str(path)
+
+
+def test_shared_per_read_stats(per_read_stats_tsv, tmp_path):
+    """Test sharing the prepared stats through a memory-mapped file."""
+    shared_dir = tmp_path / "shared"
+    shared_dir.mkdir()
+    df = dashboard.shared_per_read_stats(per_read_stats_tsv, shared_dir=shared_dir)
+    expected = dashboard.prepare_per_read_stats(per_read_stats_tsv)
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+    assert df["read_id"].tolist() == ["r1", "r2", "r0"]
+    assert len(list(shared_dir.glob("*.arrow"))) == 1
+
+
+def test_shared_per_read_stats_fallback(per_read_stats_tsv, tmp_path):
+    """Test loading the stats into memory if they can't be shared."""
+    df = dashboard.shared_per_read_stats(
+        per_read_stats_tsv, shared_dir=str(tmp_path / "missing")
+    )
+    assert df["read_id"].tolist() == ["r1", "r2", "r0"]
+
+
+def test_visibility_patch():
+    """Test that every trace's visibility is patched, also of unchanged samples."""
+    patch = dashboard.visibility_patch(
+        ["s1", "s2", "s1", "s3"], ["s1", "s3"], hidden="legendonly"
+    )
+    assert [op["params"]["value"] for op in patch.to_plotly_json()["operations"]] == [
+        True,
+        "legendonly",
+        True,
+        True,
+    ]
+
+
+def test_create_app_many_samples(tmp_path):
+    """Test building the dashboard for more samples than fit int8 products."""
+    path = tmp_path / "per-read-stats.tsv"
+    rows = [
+        f"r{i}\ta.fastq\ts{i % 50}\t{100 * (i + 1)}\t{5 + i % 15}\n" for i in range(200)
+    ]
+    path.write_text(
+        "read_id\tfilename\tsample_name\tread_length\tmean_quality\n" + "".join(rows)
+    )
+    app = dashboard.create_app(str(path))
+    assert app.layout is not None
+
+
+def test_load_per_read_stats_cache(per_read_stats_tsv):
+    """Test caching the stats as Parquet, and ignoring a truncated cache."""
+    df = dashboard.load_per_read_stats(per_read_stats_tsv)
+    cached = per_read_stats_tsv + ".parquet"
+    pd.testing.assert_frame_equal(dashboard.load_per_read_stats(per_read_stats_tsv), df)
+
+    # e.g. left behind by a process killed while writing it
+    with open(cached, "r+b") as fh:
+        fh.truncate(10)
+    pd.testing.assert_frame_equal(dashboard.load_per_read_stats(per_read_stats_tsv), df)
+    # the cache was written again
+    pd.testing.assert_frame_equal(pd.read_parquet(cached), df)
+
+
+@pytest.mark.parametrize("x_range", [(-100, 200), (70_000, 80_000)])
+def test_uniform_bin_counts_bounds_outside_dtype(x_range):
+    """Test binning small integers with range bounds that don't fit their dtype."""
+    x = np.array([0, 50, 100, 200], dtype=np.uint16)
+    x = x[(x >= x_range[0]) & (x <= x_range[1])]
+    y = np.ones(len(x), dtype=np.float32)
+    counts = dashboard.uniform_bin_counts(x, y, x_range, (0, 2), 3, 2)
+    expected, _, _ = np.histogram2d(
+        x, y, bins=[np.linspace(*x_range, 4), np.linspace(0, 2, 3)]
+    )
+    np.testing.assert_array_equal(counts, expected)